@@ -0,0 +1,34 @@
+from src.risk_rules import FLAG_VALUES
+
+# Labels of the DOS (Déclaration d'Opérations Suspectes) indicators, as shown in the charts
+REFUSALS = "Refus Suspect"
+TERMINATIONS = "Mise à Terme Suspecte"
+REFUSALS_WITHOUT_DOS = "Refus SANS Déclaration DOS"
+TERMINATIONS_WITHOUT_DOS = "Mise à Terme SANS Déclaration DOS"
+
+
+def suspicious_operations_by_sector(data):
+    """
+    Count the DOS indicators of every sector in one grouped aggregation.
+
+    Expects the SURVEY_ID, SECTOR, BU_REL_REFUSAL, BU_REL_TERM and SUSP_TRANS_SURVEY
+    columns, with flags either raw ("X" / empty) or normalized ("Y" / "N"). Each survey
+    is counted once. The input frame is not modified; the result is indexed by SECTOR
+    in order of first appearance.
+    """
+    unique_data = data.drop_duplicates(subset=["SURVEY_ID"])
+
+    refusal = unique_data["BU_REL_REFUSAL"].isin(list(FLAG_VALUES))
+    termination = unique_data["BU_REL_TERM"].isin(list(FLAG_VALUES))
+    no_declaration = ~unique_data["SUSP_TRANS_SURVEY"].isin(list(FLAG_VALUES))
+
+    indicators = unique_data[["SECTOR"]].assign(
+        **{
+            REFUSALS: refusal,
+            TERMINATIONS: termination,
+            REFUSALS_WITHOUT_DOS: refusal & no_declaration,
+            TERMINATIONS_WITHOUT_DOS: termination & no_declaration,
+        }
+    )
+
+    return indicators.groupby("SECTOR", sort=False).sum().astype(int)
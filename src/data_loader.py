@@ -1,5 +1,12 @@
-import fireducks.pandas as pd
+import os
 from src import PROCESSED_DATA_DIR
+from src.lazy_import import LazyModule
+from src.schema import SchemaError, validate
+
+pd = LazyModule("fireducks.pandas")
+# The raw workbooks are read with plain pandas: a stray string in a numeric column
+# cannot be held by a fireducks frame, so it could not be reported as a violation
+pandas = LazyModule("pandas")
 
 
 class DataLoader:
@@ -19,23 +26,49 @@ class DataLoader:
             "soft_check": "aml_soft_check.xlsx",
         }
 
+    def read_sources(self):
+        """
+        Read the five raw workbooks and validate them against their schema.
+
+        Every row-level violation is written to schema_violations.csv in the output
+        directory and a SchemaError is raised, so that bad files are caught before the
+        merge rather than as wrong charts at the end of the run. Returns the coerced
+        workbooks as fireducks frames.
+        """
+        sources = {}
+        violations = []
+
+        for source, file_name in self.file_mapping.items():
+            data = pandas.read_excel(
+                self.xlsx_file_dir + "/" + file_name, sheet_name=0
+            )
+            sources[source], source_violations = validate(source, data)
+            violations.append(source_violations)
+
+        violations = pandas.concat(violations, ignore_index=True)
+        report_path = self.output_dir + "/schema_violations.csv"
+
+        if len(violations) > 0:
+            violations.to_csv(report_path, index=False)
+            raise SchemaError(
+                f"{len(violations)} schema violations found in the raw data, "
+                f"see {report_path}"
+            )
+
+        if os.path.exists(report_path):
+            os.remove(report_path)
+
+        # Valid and coerced, the data can now be handed over to fireducks
+        return {source: pd.from_pandas(data) for source, data in sources.items()}
+
     def merge_all_data(self):
 
-        master = pd.read_excel(
-            self.xlsx_file_dir + "/" + self.file_mapping["master"], sheet_name=0
-        )
-        quest = pd.read_excel(
-            self.xlsx_file_dir + "/" + self.file_mapping["quest"], sheet_name=0
-        )
-        payment = pd.read_excel(
-            self.xlsx_file_dir + "/" + self.file_mapping["payment"], sheet_name=0
-        )
-        revenue = pd.read_excel(
-            self.xlsx_file_dir + "/" + self.file_mapping["revenue"], sheet_name=0
-        )
-        soft_check = pd.read_excel(
-            self.xlsx_file_dir + "/" + self.file_mapping["soft_check"], sheet_name=0
-        )
+        sources = self.read_sources()
+        master = sources["master"]
+        quest = sources["quest"]
+        payment = sources["payment"]
+        revenue = sources["revenue"]
+        soft_check = sources["soft_check"]
 
         merged = master.copy()
 
@@ -0,0 +1,88 @@
+from src.lazy_import import LazyModule
+
+pd = LazyModule("fireducks.pandas")
+
+DECLARATION_KEY = ["REVENUE_KIND", "REVENUE_YEAR", "REVENUE"]
+
+
+class EntityIndex:
+    """
+    Group the SURVEY_IDs filed by the same entity.
+
+    The master data only holds SECTOR and DEC_YEAR, which cannot tell two entities
+    apart, so surveys are linked through their revenue declarations instead: a survey
+    repeats the revenues of the previous years, so two filings of the same entity
+    report the same (REVENUE_KIND, REVENUE_YEAR, REVENUE) triples.
+
+    Each distinct triple is a blocking key. Keys shared by more than max_block_size
+    surveys (round amounts such as 5000.00) carry no identity and are dropped, which
+    also bounds the number of candidate pairs to O(n * max_block_size). Two surveys are
+    linked when they share at least min_shared_declarations keys, and linked surveys
+    are merged transitively. Sectors are not used for blocking, so an entity filing in
+    several sectors is still found.
+    """
+
+    def __init__(
+        self, data, min_shared_declarations: int = 2, max_block_size: int = 5
+    ):
+        # The revenue column of the raw workbook is padded with spaces
+        data = data.rename(columns=lambda column: column.strip())
+
+        declarations = data[["SURVEY_ID"] + DECLARATION_KEY].dropna()
+        declarations = declarations[declarations["REVENUE"] > 0].assign(
+            REVENUE=lambda frame: frame["REVENUE"].round(2)
+        )
+        declarations = declarations.drop_duplicates()
+
+        declarations["BLOCK"] = declarations.groupby(DECLARATION_KEY).ngroup()
+        block_size = declarations.groupby("BLOCK")["SURVEY_ID"].transform("size")
+        declarations = declarations[
+            (block_size > 1) & (block_size <= max_block_size)
+        ][["BLOCK", "SURVEY_ID"]]
+
+        pairs = declarations.merge(declarations, on="BLOCK", suffixes=("", "_OTHER"))
+        pairs = pairs[pairs["SURVEY_ID"] < pairs["SURVEY_ID_OTHER"]]
+        shared = pairs.groupby(["SURVEY_ID", "SURVEY_ID_OTHER"]).size()
+        links = shared[shared >= min_shared_declarations].index.tolist()
+
+        survey_ids = data["SURVEY_ID"].drop_duplicates().tolist()
+        self.entities = pd.DataFrame(
+            {
+                "SURVEY_ID": survey_ids,
+                "ENTITY_ID": self._resolve(survey_ids, links),
+            }
+        )
+
+    @staticmethod
+    def _resolve(survey_ids, links):
+        """
+        Union-find over the linked pairs. Every survey is mapped to the smallest
+        SURVEY_ID of its entity.
+        """
+        parent = {survey_id: survey_id for survey_id in survey_ids}
+
+        def find(survey_id):
+            root = survey_id
+            while parent[root] != root:
+                root = parent[root]
+            while parent[survey_id] != root:
+                parent[survey_id], survey_id = root, parent[survey_id]
+            return root
+
+        for survey_id, other in links:
+            root, other_root = find(survey_id), find(other)
+            if root != other_root:
+                parent[max(root, other_root)] = min(root, other_root)
+
+        return [find(survey_id) for survey_id in survey_ids]
+
+    def add_entity_ids(self, data):
+        """
+        Return a copy of data with an ENTITY_ID column. Surveys unknown to the index
+        are their own entity.
+        """
+        data = data.merge(self.entities, on="SURVEY_ID", how="left")
+        data["ENTITY_ID"] = (
+            data["ENTITY_ID"].fillna(data["SURVEY_ID"]).astype(data["SURVEY_ID"].dtype)
+        )
+        return data
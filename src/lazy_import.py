@@ -0,0 +1,23 @@
+import importlib
+
+
+class LazyModule:
+    """
+    Stand-in for a module that is only imported on first attribute access.
+
+    Used for the heavy dependencies (fireducks, numpy, matplotlib) so that importing
+    `src` stays cheap and tasks that never plot never load matplotlib.
+    """
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module '{self._name}' ({state})>"
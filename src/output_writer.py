@@ -0,0 +1,167 @@
+import io
+import multiprocessing
+import os
+import pickle
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from src.lazy_import import LazyModule
+
+pd = LazyModule("pandas")
+
+
+def _atomic_path(path: str):
+    # Write next to the target and rename it at the end so that readers never see a
+    # partial file. The name is unique so that two queued writes to the same target
+    # cannot collide, and it ends with the target name so its extension still selects
+    # the format.
+    directory, name = os.path.split(path)
+    fd, tmp_path = tempfile.mkstemp(prefix=".", suffix="." + name, dir=directory or ".")
+    os.close(fd)
+    # mkstemp makes the file private, give it the usual permissions of an output
+    os.chmod(tmp_path, 0o644)
+    return tmp_path
+
+
+def _image_format(path: str):
+    return os.path.splitext(path)[1][1:]
+
+
+def _save_figure(fig, path: str, savefig_kwargs: dict):
+    if isinstance(fig, bytes):
+        fig = pickle.loads(fig)
+    tmp_path = _atomic_path(path)
+    fig.savefig(tmp_path, format=_image_format(path), **savefig_kwargs)
+    os.replace(tmp_path, path)
+    return path
+
+
+def _save_bytes(content: bytes, path: str):
+    tmp_path = _atomic_path(path)
+    with open(tmp_path, "wb") as file:
+        file.write(content)
+    os.replace(tmp_path, path)
+    return path
+
+
+def _save_excel(path: str, sheets: list):
+    tmp_path = _atomic_path(path)
+    with pd.ExcelWriter(tmp_path) as writer:
+        for frame, to_excel_kwargs in sheets:
+            frame.to_excel(writer, **to_excel_kwargs)
+    os.replace(tmp_path, path)
+    return path
+
+
+class OutputWriter:
+    """
+    Write finished charts and tables in the background so that the next analysis can
+    start while the previous outputs are being rendered and saved.
+
+    Outputs are snapshotted in the calling thread (figures are pickled, fireducks
+    frames converted to plain pandas, as neither library may be used from two threads
+    at once) and then written by a pool of worker processes, or threads with
+    use_processes=False. Figures that cannot be pickled (e.g. bar labels without an
+    explicit fmt) are rendered in the calling thread and only written in the
+    background. At most max_pending outputs are queued at a time; submitting more
+    blocks until a slot frees up. Call flush() before exiting to make sure
+    everything is on disk, it re-raises the first error raised by a write.
+
+    With max_workers=0 every output is written immediately in the calling thread,
+    which is what the Visualizer and RiskAnalyzer do when no writer is given.
+    """
+
+    def __init__(
+        self, max_workers: int = 2, max_pending: int = 4, use_processes: bool = True
+    ):
+        if max_workers == 0:
+            self.executor = None
+        elif use_processes:
+            # Spawn rather than fork: the parent runs fireducks' own threads
+            self.executor = ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        else:
+            self.executor = ThreadPoolExecutor(max_workers=max_workers)
+
+        self.slots = threading.BoundedSemaphore(max_pending)
+        self.pending = []
+        self.lock = threading.Lock()
+
+    def _submit(self, fn, *args):
+        if self.executor is None:
+            return fn(*args)
+
+        self.slots.acquire()
+        try:
+            future = self.executor.submit(fn, *args)
+        except BaseException:
+            self.slots.release()
+            raise
+
+        future.add_done_callback(lambda _: self.slots.release())
+        with self.lock:
+            self.pending.append(future)
+        return future
+
+    def save_figure(self, fig, path: str, **savefig_kwargs):
+        """
+        Queue a matplotlib figure to be saved to path.
+        """
+        if self.executor is None:
+            return self._submit(_save_figure, fig, path, savefig_kwargs)
+
+        try:
+            pickled_fig = pickle.dumps(fig)
+        except (AttributeError, TypeError, pickle.PicklingError):
+            buffer = io.BytesIO()
+            fig.savefig(buffer, format=_image_format(path), **savefig_kwargs)
+            return self._submit(_save_bytes, buffer.getvalue(), path)
+
+        return self._submit(_save_figure, pickled_fig, path, savefig_kwargs)
+
+    def save_excel(self, frame, path: str, **to_excel_kwargs):
+        """
+        Queue a DataFrame to be written to an Excel file.
+        """
+        return self.save_excel_sheets(path, [(frame, to_excel_kwargs)])
+
+    def save_excel_sheets(self, path: str, sheets: list):
+        """
+        Queue several DataFrames to be written to the same Excel file, given as a list
+        of (frame, to_excel kwargs) pairs, e.g. to put them on different sheets.
+        """
+        sheets = [
+            (frame.to_pandas() if hasattr(frame, "to_pandas") else frame, kwargs)
+            for frame, kwargs in sheets
+        ]
+        return self._submit(_save_excel, path, sheets)
+
+    def flush(self):
+        """
+        Block until every queued output is written.
+        """
+        with self.lock:
+            pending, self.pending = self.pending, []
+
+        errors = [future.exception() for future in pending]
+        errors = [error for error in errors if error is not None]
+        if errors:
+            raise errors[0]
+
+    def close(self):
+        """
+        Flush the remaining outputs and shut the workers down.
+        """
+        try:
+            self.flush()
+        finally:
+            if self.executor is not None:
+                self.executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -1,7 +1,23 @@
-import fireducks.pandas as pd
-import numpy as np
 import os
 from src import OUTPUT_DIR
+from src.entity_resolution import EntityIndex
+from src.lazy_import import LazyModule
+from src.output_writer import OutputWriter
+from src.risk_rules import (
+    COMPLIANT_ARCHIVING,
+    FLAG_VALUES,
+    IDENTIFICATION_LEVELS,
+    LOW_RISK_MAX_SCORE,
+    MEDIUM_RISK_MAX_SCORE,
+    NON_LU_REGION,
+    RISK_INPUT_COLUMNS,
+    RULE_VERSION,
+    risk_indicators,
+)
+from src.score_store import ScoreStore
+
+pd = LazyModule("fireducks.pandas")
+np = LazyModule("numpy")
 
 
 class RiskAnalyzer:
@@ -9,16 +25,40 @@ class RiskAnalyzer:
     Class to analyze the risk data and generate visualizations.
     """
 
-    def __init__(self, data_loader):
+    def __init__(
+        self,
+        data_loader,
+        writer: OutputWriter = None,
+        score_store: ScoreStore = None,
+    ):
         self.data_loader = data_loader
+        # Without a shared writer, the result tables are written before each method returns
+        self.writer = writer if writer is not None else OutputWriter(max_workers=0)
+        # With a score store, only the rows whose inputs or rules changed are re-scored
+        self.score_store = score_store
+        # Id of the run recorded by this analyzer, a pipeline execution records only one
+        self.run_id = None
+
+    def _processed_data_is_current(self):
+        """
+        The processed data is a cache of the merged data, only valid when it was written
+        after the merged data, so that changes to the raw workbooks are picked up.
+        """
+        processed_path = (
+            self.data_loader.output_dir + "/risk_analysis_processed_data.xlsx"
+        )
+        merged_path = self.data_loader.output_dir + "/merged_data.xlsx"
+        if not os.path.exists(processed_path):
+            return False
+        if not os.path.exists(merged_path):
+            return True
+        return os.path.getmtime(processed_path) >= os.path.getmtime(merged_path)
 
     def load_data(self):
         """
         Load the merged data from the DataLoader.
         """
-        if os.path.exists(
-            self.data_loader.output_dir + "/risk_analysis_processed_data.xlsx"
-        ):
+        if self._processed_data_is_current():
             return pd.read_excel(
                 self.data_loader.output_dir + "/risk_analysis_processed_data.xlsx"
             )
@@ -30,51 +70,43 @@ class RiskAnalyzer:
         Process the data for risk analysis.
         """
 
-        if os.path.exists(
-            self.data_loader.output_dir + "/risk_analysis_processed_data.xlsx"
-        ):
+        if self._processed_data_is_current():
             return print("Data already processed. You can skip this step.")
         
         print("Processing data for risk analysis...")
         data = self.load_data()
 
         # First we normalize the data in the Refusal and Termination columns
-        data["BU_REL_REFUSAL"] = data["BU_REL_REFUSAL"].replace({"X": "Y", None: "N"})
-        data["BU_REL_TERM"] = data["BU_REL_TERM"].replace({"X": "Y", None: "N"})
-        data["SUSP_TRANS_SURVEY"] = data["SUSP_TRANS_SURVEY"].replace(
-            {"X": "Y", None: "N"}
-        )
+        for column in ["BU_REL_REFUSAL", "BU_REL_TERM", "SUSP_TRANS_SURVEY"]:
+            data[column] = (
+                data[column].isin(list(FLAG_VALUES)).map({True: "Y", False: "N"})
+            )
 
         # Then we create a column that tracks how well the identification compliance is done
-        condition1 = (data["CLIENT_ID_STATUS"] == "AVANCEE") & (
-            data["BENIFICIARY_ID_STATUS"] == "AVANCEE"
-        )
-        condition2 = (data["CLIENT_ID_STATUS"] == "SIMPLE") & (
-            data["BENIFICIARY_ID_STATUS"] == "SIMPLE"
-        )
-        condition3 = data["CLIENT_ID_STATUS"] != data["BENIFICIARY_ID_STATUS"]
+        conditions = [
+            (data["CLIENT_ID_STATUS"] == level)
+            & (data["BENIFICIARY_ID_STATUS"] == level)
+            for level in IDENTIFICATION_LEVELS
+        ]
+        conditions.append(data["CLIENT_ID_STATUS"] != data["BENIFICIARY_ID_STATUS"])
 
-        choices = ["AVANCEE", "SIMPLE", "RISK"]
+        choices = list(IDENTIFICATION_LEVELS) + ["RISK"]
 
-        data["IDENTIFICATION_COMPLIANCE"] = np.select(
-            [condition1, condition2, condition3], choices, default="NA"
-        )
+        data["IDENTIFICATION_COMPLIANCE"] = np.select(conditions, choices, default="NA")
 
         # We can also create a column for document archiving compliance
-        data["ARCHIVING_COMPLIANCE"] = data.apply(
-            lambda row: (
-                "Conforme"
-                if row["DOCUMENT_ARCHIVING"] == "5A"
-                or row["DOCUMENT_ARCHIVING"] == "5A+"
-                else "Non Conforme"
-            ),
-            axis=1,
+        data["ARCHIVING_COMPLIANCE"] = (
+            data["DOCUMENT_ARCHIVING"]
+            .isin(list(COMPLIANT_ARCHIVING))
+            .map({True: "Conforme", False: "Non Conforme"})
         )
 
         # Also to track the country of origin of the client we can add a column
-        non_lu_clients = data[data["REGION"] == "NON LU"]["SURVEY_ID"].unique()
+        non_lu_clients = data[data["REGION"] == NON_LU_REGION]["SURVEY_ID"].unique()
         data["REGION_RISK"] = (
-            data["SURVEY_ID"].isin(non_lu_clients).map({True: "NON LU", False: "LU"})
+            data["SURVEY_ID"]
+            .isin(non_lu_clients)
+            .map({True: NON_LU_REGION, False: "LU"})
         )
 
         # We will keep only the relevant columns for the risk analysis
@@ -93,6 +125,7 @@ class RiskAnalyzer:
 
         data = data[relevant_columns]
 
+        # Written synchronously, the next steps read this file back
         data.to_excel(
             self.data_loader.output_dir + "/risk_analysis_processed_data.xlsx",
             index=False,
@@ -100,13 +133,32 @@ class RiskAnalyzer:
 
         return data
 
+    @staticmethod
+    def _risk_indicators(data):
+        """
+        One boolean column per risk criterion, True when the row counts as a risk
+        factor (see risk_rules.risk_indicators).
+        """
+        return pd.DataFrame(risk_indicators(data))
+
+    @staticmethod
+    def _categorize(risk_scores):
+        """
+        Map risk scores to their Low / Medium / High category.
+        """
+        conditions = [
+            (risk_scores <= LOW_RISK_MAX_SCORE),
+            (risk_scores > LOW_RISK_MAX_SCORE) & (risk_scores <= MEDIUM_RISK_MAX_SCORE),
+            (risk_scores > MEDIUM_RISK_MAX_SCORE),
+        ]
+        choices = ["Low", "Medium", "High"]
+        return np.select(conditions, choices, default="Unknown")
+
     def calculate_risk_scores(self):
         """
         Calculate risk scores based on the processed data.
         """
-        if not os.path.exists(
-            self.data_loader.output_dir + "/risk_analysis_processed_data.xlsx"
-        ):
+        if not self._processed_data_is_current():
             data = self.process_data()
         else:
             data = self.load_data()
@@ -123,51 +175,132 @@ class RiskAnalyzer:
         # - If any cell is NaN, we will not count it as a risk factor.
         # This will give us a total possible risk score of 8
 
-        data["RISK_SCORE"] = 0
-        data.loc[data["BU_REL_REFUSAL"] == "Y", "RISK_SCORE"] += 1
-        data.loc[data["BU_REL_TERM"] == "Y", "RISK_SCORE"] += 1
-        data.loc[data["IDENTIFICATION_COMPLIANCE"] == "RISK", "RISK_SCORE"] += 1
-        data.loc[data["ARCHIVING_COMPLIANCE"] == "Non Conforme", "RISK_SCORE"] += 1
-        data.loc[data["REGION_RISK"] == "NON LU", "RISK_SCORE"] += 1
-        data.loc[data["PAYMENT_METHOD"] == "CASH", "RISK_SCORE"] += 1
-        data.loc[
-            data["REVENUE_KIND"].isin(
-                ["SERV_CREATION_S", "SERV_FONCTION", "SERV_VIRTUEL"]
-            ),
-            "RISK_SCORE",
-        ] += 1
-        data.loc[data["NB_TRANSACTIONS"] > 61, "RISK_SCORE"] += 1
-
         # Now we can categorize the risk score into low, medium, and high risk where:
         # - 0-1 is low risk
         # - 2-3 is medium risk
         # - >3 is high risk
 
-        conditions = [
-            (data["RISK_SCORE"] <= 1),
-            (data["RISK_SCORE"] >= 2) & (data["RISK_SCORE"] <= 3),
-            (data["RISK_SCORE"] > 3),
-        ]
-        choices = ["Low", "Medium", "High"]
-        data["RISK_CATEGORY"] = np.select(conditions, choices, default="Unknown")
+        if self.score_store is None:
+            data["RISK_SCORE"] = self._risk_indicators(data).sum(axis=1).astype(int)
+            data["RISK_CATEGORY"] = self._categorize(data["RISK_SCORE"])
+        else:
+            data = self._score_changed_rows(data)
 
-        data.to_excel(
+        self.writer.save_excel(
+            data,
             self.data_loader.output_dir + "/risk_analysis_scores.xlsx",
             index=False,
         )
 
         return data
 
-    def find_high_risk_clients(self):
+    def _score_changed_rows(self, data):
+        """
+        Reuse the stored scores of the rows whose inputs and rule version did not change
+        since the latest run, score the other rows and store the result as a new run.
+        Only the first calculation of the analyzer is stored, so that calling
+        calculate_risk_scores again does not record a second run of the same pipeline.
+        """
+        data["INPUT_HASH"] = ScoreStore.input_hashes(data, list(RISK_INPUT_COLUMNS))
+
+        previous = self.score_store.lookup(RULE_VERSION)
+        if previous is not None:
+            data = data.merge(previous, on=["SURVEY_ID", "INPUT_HASH"], how="left")
+        else:
+            data["RISK_SCORE"] = np.nan
+            data["RISK_CATEGORY"] = None
+
+        changed = data["RISK_SCORE"].isna()
+        print(f"Scoring {changed.sum()} new or changed rows out of {len(data)}...")
+
+        if changed.any():
+            risk_scores = self._risk_indicators(data[changed]).sum(axis=1)
+            data.loc[changed, "RISK_SCORE"] = risk_scores
+            data.loc[changed, "RISK_CATEGORY"] = self._categorize(risk_scores)
+
+        data["RISK_SCORE"] = data["RISK_SCORE"].astype(int)
+
+        if self.run_id is None:
+            self.run_id = self.score_store.save(
+                data[["SURVEY_ID", "SECTOR", "INPUT_HASH"]].assign(
+                    RULE_VERSION=RULE_VERSION,
+                    RISK_SCORE=data["RISK_SCORE"],
+                    RISK_CATEGORY=data["RISK_CATEGORY"].astype(str),
+                )
+            )
+
+        return data.drop(columns=["INPUT_HASH"])
+
+    def report_category_changes(self):
+        """
+        List the clients whose risk category changed between the previous stored run
+        and the run recorded by this analyzer (the latest run if it has not scored yet).
+        """
+        changes = self.score_store.diff(current_run=self.run_id)
+
+        self.writer.save_excel(
+            changes,
+            OUTPUT_DIR + "/tables/risk_category_changes.xlsx",
+            index=False,
+        )
+
+        return changes
+
+    def find_high_risk_clients(self, entity_index: EntityIndex = None, data=None):
         """
         Find high risk clients based on the risk scores.
+
+        Pass the frame returned by calculate_risk_scores as data to reuse it, otherwise
+        the scores are calculated (and their table written) again.
+
+        With an EntityIndex, the surveys of the same entity are also scored together:
+        every risk factor raised by any of its surveys counts once towards the entity
+        score, so an entity is never scored lower than its riskiest survey. The high
+        risk clients then get their entity columns, and the high risk entities are
+        written to a separate table.
         """
-        data = self.calculate_risk_scores()
+        if data is None:
+            data = self.calculate_risk_scores()
         data = data.drop_duplicates(subset=["SURVEY_ID"])
 
+        if entity_index is not None:
+            data = entity_index.add_entity_ids(data)
+
+            entity_indicators = (
+                self._risk_indicators(data).groupby(data["ENTITY_ID"]).any()
+            )
+            entities = pd.DataFrame(
+                {
+                    "ENTITY_SURVEYS": data.groupby("ENTITY_ID")["SURVEY_ID"].nunique(),
+                    "ENTITY_SECTORS": data.groupby("ENTITY_ID")["SECTOR"].nunique(),
+                    "ENTITY_RISK_SCORE": entity_indicators.sum(axis=1).astype(int),
+                }
+            )
+            entities["ENTITY_RISK_CATEGORY"] = self._categorize(
+                entities["ENTITY_RISK_SCORE"]
+            )
+            entities = entities.reset_index()
+            data = data.merge(entities, on="ENTITY_ID", how="left")
+
+            high_risk_entities = entities[
+                entities["ENTITY_RISK_CATEGORY"] == "High"
+            ].merge(
+                data[
+                    ["ENTITY_ID", "SURVEY_ID", "SECTOR", "RISK_SCORE", "RISK_CATEGORY"]
+                ],
+                on="ENTITY_ID",
+            )
+
+            self.writer.save_excel(
+                high_risk_entities,
+                OUTPUT_DIR + "/tables/all_high_risk_entities.xlsx",
+                index=False,
+            )
+
         high_risk_clients = data[data["RISK_CATEGORY"] == "High"]
 
-        high_risk_clients.to_excel(
+        self.writer.save_excel(
+            high_risk_clients,
             OUTPUT_DIR + "/tables/all_high_risk_clients.xlsx",
             index=False,
         )
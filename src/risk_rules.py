@@ -0,0 +1,133 @@
+import hashlib
+import math
+
+# Rule tables shared by the batch RiskAnalyzer and the online scorer (src.risk_service).
+# Keeping them in one place guarantees that both paths score a client the same way.
+
+FLAG_VALUES = ("X", "Y")
+IDENTIFICATION_LEVELS = ("AVANCEE", "SIMPLE")
+COMPLIANT_ARCHIVING = ("5A", "5A+")
+NON_LU_REGION = "NON LU"
+CASH_PAYMENT = "CASH"
+HIGH_RISK_REVENUE_KINDS = ("SERV_CREATION_S", "SERV_FONCTION", "SERV_VIRTUEL")
+NB_TRANSACTIONS_THRESHOLD = 61
+
+# Upper bounds (inclusive) of the Low and Medium categories, everything above is High
+LOW_RISK_MAX_SCORE = 1
+MEDIUM_RISK_MAX_SCORE = 3
+
+# Columns of the processed risk analysis data the risk score depends on, one rule per
+# column (see risk_indicators). NB_TRANSACTIONS is last, RiskSweep varies its threshold.
+RISK_INPUT_COLUMNS = (
+    "BU_REL_REFUSAL",
+    "BU_REL_TERM",
+    "IDENTIFICATION_COMPLIANCE",
+    "ARCHIVING_COMPLIANCE",
+    "REGION_RISK",
+    "PAYMENT_METHOD",
+    "REVENUE_KIND",
+    "NB_TRANSACTIONS",
+)
+
+# Version of the scoring logic itself, which the fingerprint below cannot see. Bump it
+# by hand whenever the way the tables are applied changes, i.e. risk_indicators (used
+# by RiskAnalyzer and RiskSweep), score_record or the columns built by
+# RiskAnalyzer.process_data. Changing RISK_INPUT_COLUMNS already changes every
+# INPUT_HASH.
+RULE_LOGIC_VERSION = "1"
+
+# Fingerprint of the scoring logic and of the rule tables above. Stored scores computed
+# under another version are recomputed (see ScoreStore).
+RULE_VERSION = hashlib.sha1(
+    repr(
+        (
+            RULE_LOGIC_VERSION,
+            FLAG_VALUES,
+            IDENTIFICATION_LEVELS,
+            COMPLIANT_ARCHIVING,
+            NON_LU_REGION,
+            CASH_PAYMENT,
+            HIGH_RISK_REVENUE_KINDS,
+            NB_TRANSACTIONS_THRESHOLD,
+            LOW_RISK_MAX_SCORE,
+            MEDIUM_RISK_MAX_SCORE,
+        )
+    ).encode("utf-8")
+).hexdigest()[:12]
+
+
+def _is_missing(value):
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+def categorize_risk_score(score):
+    """
+    Map a risk score to its Low / Medium / High category.
+    """
+    if score <= LOW_RISK_MAX_SCORE:
+        return "Low"
+    if score <= MEDIUM_RISK_MAX_SCORE:
+        return "Medium"
+    return "High"
+
+
+def risk_indicators(data):
+    """
+    Evaluate every rule on the processed risk analysis data (see
+    RiskAnalyzer.process_data).
+
+    Returns a dict of rule name to boolean Series, in RISK_INPUT_COLUMNS order, True
+    where the row counts as a risk factor. Empty cells never count as a risk factor.
+    """
+    return {
+        "BU_REL_REFUSAL": data["BU_REL_REFUSAL"] == "Y",
+        "BU_REL_TERM": data["BU_REL_TERM"] == "Y",
+        "IDENTIFICATION_COMPLIANCE": data["IDENTIFICATION_COMPLIANCE"] == "RISK",
+        "ARCHIVING_COMPLIANCE": data["ARCHIVING_COMPLIANCE"] == "Non Conforme",
+        "REGION_RISK": data["REGION_RISK"] == NON_LU_REGION,
+        "PAYMENT_METHOD": data["PAYMENT_METHOD"] == CASH_PAYMENT,
+        "REVENUE_KIND": data["REVENUE_KIND"].isin(list(HIGH_RISK_REVENUE_KINDS)),
+        "NB_TRANSACTIONS": data["NB_TRANSACTIONS"] > NB_TRANSACTIONS_THRESHOLD,
+    }
+
+
+def score_record(record):
+    """
+    Score a single survey given its raw master/quest/payment/revenue attributes.
+
+    The record is a mapping using the column names of the raw workbooks (SECTOR,
+    REGION, BU_REL_REFUSAL, BU_REL_TERM, CLIENT_ID_STATUS, BENIFICIARY_ID_STATUS,
+    DOCUMENT_ARCHIVING, PAYMENT_METHOD, REVENUE_KIND, NB_TRANSACTIONS). Missing keys
+    are treated like empty cells, i.e. they never count as a risk factor, except for
+    identification and archiving where a missing value is non-compliant, exactly as
+    in RiskAnalyzer.process_data. REGION may also be the list of regions of all the
+    payment rows of the survey, in which case one NON LU row flags the whole survey.
+    """
+    region = record.get("REGION")
+    client_id = record.get("CLIENT_ID_STATUS")
+    beneficiary_id = record.get("BENIFICIARY_ID_STATUS")
+    nb_transactions = record.get("NB_TRANSACTIONS")
+
+    identification_ok = (
+        client_id in IDENTIFICATION_LEVELS and client_id == beneficiary_id
+    )
+
+    score = 0
+    score += record.get("BU_REL_REFUSAL") in FLAG_VALUES
+    score += record.get("BU_REL_TERM") in FLAG_VALUES
+    score += not identification_ok
+    score += record.get("DOCUMENT_ARCHIVING") not in COMPLIANT_ARCHIVING
+    score += region == NON_LU_REGION or (
+        isinstance(region, (list, tuple)) and NON_LU_REGION in region
+    )
+    score += record.get("PAYMENT_METHOD") == CASH_PAYMENT
+    score += record.get("REVENUE_KIND") in HIGH_RISK_REVENUE_KINDS
+    score += (
+        not _is_missing(nb_transactions)
+        and float(nb_transactions) > NB_TRANSACTIONS_THRESHOLD
+    )
+
+    return {
+        "RISK_SCORE": int(score),
+        "RISK_CATEGORY": categorize_risk_score(score),
+    }
@@ -0,0 +1,103 @@
+import asyncio
+import json
+from src.risk_rules import score_record
+
+# Lightweight online scoring API for onboarding: scores one client at a time with
+# the same rules as RiskAnalyzer.calculate_risk_scores, without loading the workbooks.
+# Run it with `python -m src.risk_service` and POST a JSON record to /score.
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8080
+
+
+def score_client(record: dict):
+    """
+    In-process entry point: score a single survey record.
+    """
+    return score_record(record)
+
+
+def _http_response(status: str, payload: dict):
+    body = json.dumps(payload).encode("utf-8")
+    head = (
+        f"HTTP/1.1 {status}\r\n"
+        "Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        "Connection: keep-alive\r\n"
+        "\r\n"
+    )
+    return head.encode("latin-1") + body
+
+
+async def _handle_connection(reader, writer):
+    """
+    Serve the requests of one connection. Each connection runs in its own task so
+    concurrent clients are handled by the event loop.
+    """
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+
+            parts = request_line.decode("latin-1").split()
+            method, path = (parts[0], parts[1]) if len(parts) >= 2 else ("", "")
+            try:
+                length = int(headers.get("content-length", 0) or 0)
+                if length < 0:
+                    raise ValueError
+            except ValueError:
+                # Without a valid length the rest of the stream cannot be framed
+                writer.write(
+                    _http_response(
+                        "400 Bad Request", {"error": "Invalid Content-Length"}
+                    )
+                )
+                await writer.drain()
+                break
+            body = await reader.readexactly(length) if length else b""
+
+            if method == "GET" and path == "/health":
+                response = _http_response("200 OK", {"status": "ok"})
+            elif method == "POST" and path == "/score":
+                try:
+                    record = json.loads(body or b"{}")
+                    if not isinstance(record, dict):
+                        raise ValueError("Expected a JSON object")
+                    response = _http_response("200 OK", score_client(record))
+                except (TypeError, ValueError) as error:
+                    response = _http_response("400 Bad Request", {"error": str(error)})
+            else:
+                response = _http_response("404 Not Found", {"error": "Not found"})
+
+            writer.write(response)
+            await writer.drain()
+
+            if headers.get("connection", "").lower() == "close":
+                break
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT):
+    """
+    Start the asyncio HTTP scoring endpoint and serve until cancelled.
+    """
+    server = await asyncio.start_server(_handle_connection, host, port)
+    print(f"Risk scoring service listening on http://{host}:{port}/score")
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    asyncio.run(serve())
@@ -0,0 +1,153 @@
+import itertools
+from src.lazy_import import LazyModule
+from src.risk_rules import (
+    LOW_RISK_MAX_SCORE,
+    MEDIUM_RISK_MAX_SCORE,
+    NB_TRANSACTIONS_THRESHOLD,
+    RISK_INPUT_COLUMNS,
+    risk_indicators,
+)
+
+pd = LazyModule("fireducks.pandas")
+np = LazyModule("numpy")
+
+# Rules of RiskAnalyzer.calculate_risk_scores, named after the column they look at.
+# NB_TRANSACTIONS is kept apart because its threshold is one of the swept parameters.
+RULES = list(RISK_INPUT_COLUMNS)
+BINARY_RULES = [rule for rule in RULES if rule != "NB_TRANSACTIONS"]
+
+CATEGORIES = ["Low", "Medium", "High"]
+
+# Upper bound on the number of (survey, scenario) cells evaluated at once
+MAX_CELLS_PER_CHUNK = 2**24
+
+
+def _as_int_if_integral(values):
+    """
+    Report whole-number parameters as ints rather than as 61.0.
+    """
+    if np.isfinite(values).all() and (values % 1 == 0).all():
+        return values.astype(np.int64)
+    return values
+
+
+def threshold_grid(
+    nb_transactions_thresholds=(NB_TRANSACTIONS_THRESHOLD,),
+    low_risk_max_scores=(LOW_RISK_MAX_SCORE,),
+    medium_risk_max_scores=(MEDIUM_RISK_MAX_SCORE,),
+):
+    """
+    Build the list of scenarios for every combination of the given thresholds.
+    """
+    return [
+        {
+            "NB_TRANSACTIONS_THRESHOLD": nb_transactions_threshold,
+            "LOW_RISK_MAX_SCORE": low_max,
+            "MEDIUM_RISK_MAX_SCORE": medium_max,
+        }
+        for nb_transactions_threshold, low_max, medium_max in itertools.product(
+            nb_transactions_thresholds, low_risk_max_scores, medium_risk_max_scores
+        )
+    ]
+
+
+class RiskSweep:
+    """
+    Evaluate many what-if variants of the risk scoring rules at once.
+
+    The per-rule indicator matrix is computed once from the processed risk analysis
+    data (see RiskAnalyzer.process_data). Each survey is counted once, using its first
+    row, like in Visualizer.plot_risk_assesment_by_sector.
+    """
+
+    def __init__(self, data):
+        unique_data = data.drop_duplicates(subset=["SURVEY_ID"])
+
+        # Same indicators as the batch scoring, the NB_TRANSACTIONS one is rebuilt per
+        # scenario from the raw counts below
+        indicators = pd.DataFrame(risk_indicators(unique_data))
+        self.indicators = indicators[BINARY_RULES].to_numpy(dtype=np.float32)
+        self.nb_transactions = unique_data["NB_TRANSACTIONS"].to_numpy(
+            dtype=np.float64, na_value=np.nan
+        )
+
+        sector_codes, self.sectors = pd.factorize(unique_data["SECTOR"])
+        sector_codes = np.asarray(sector_codes)
+        # One row per sector, used to count the surveys of each category with a matmul
+        self.sector_matrix = (
+            sector_codes[None, :] == np.arange(len(self.sectors))[:, None]
+        ).astype(np.float32)
+
+    def _scenario_arrays(self, scenarios):
+        weights = np.ones((len(scenarios), len(RULES)), dtype=np.float64)
+        thresholds = np.empty(len(scenarios), dtype=np.float64)
+        low_max = np.empty(len(scenarios), dtype=np.float64)
+        medium_max = np.empty(len(scenarios), dtype=np.float64)
+
+        for i, scenario in enumerate(scenarios):
+            for rule, weight in scenario.get("WEIGHTS", {}).items():
+                if rule not in RULES:
+                    raise ValueError(f"Unknown risk rule: {rule}")
+                weights[i, RULES.index(rule)] = weight
+            thresholds[i] = scenario.get(
+                "NB_TRANSACTIONS_THRESHOLD", NB_TRANSACTIONS_THRESHOLD
+            )
+            low_max[i] = scenario.get("LOW_RISK_MAX_SCORE", LOW_RISK_MAX_SCORE)
+            medium_max[i] = scenario.get("MEDIUM_RISK_MAX_SCORE", MEDIUM_RISK_MAX_SCORE)
+
+        return weights, thresholds, low_max, medium_max
+
+    def run(self, scenarios: list):
+        """
+        Count the surveys of each risk category per sector for every scenario.
+
+        A scenario is a dict with any of NB_TRANSACTIONS_THRESHOLD, LOW_RISK_MAX_SCORE,
+        MEDIUM_RISK_MAX_SCORE and WEIGHTS (a dict of rule name to weight, see RULES);
+        missing keys keep the values of calculate_risk_scores. Returns one row per
+        scenario and sector, with the scenario thresholds, the weight of every rule
+        (WEIGHT_<rule>) and the Low / Medium / High counts.
+        """
+        weights, thresholds, low_max, medium_max = self._scenario_arrays(scenarios)
+        # The score matrix is computed in float32 like the indicators
+        score_weights = weights.astype(np.float32)
+
+        n_surveys = len(self.nb_transactions)
+        chunk_size = max(1, MAX_CELLS_PER_CHUNK // max(n_surveys, 1))
+        counts = np.empty((len(scenarios), len(self.sectors), len(CATEGORIES)))
+
+        for start in range(0, len(scenarios), chunk_size):
+            chunk = slice(start, start + chunk_size)
+
+            # (surveys x scenarios) score matrix
+            scores = self.indicators @ score_weights[chunk, : len(BINARY_RULES)].T
+            scores += (
+                self.nb_transactions[:, None] > thresholds[None, chunk]
+            ) * score_weights[chunk, -1][None, :]
+
+            low = scores <= low_max[None, chunk]
+            medium = ~low & (scores <= medium_max[None, chunk])
+            high = ~low & ~medium
+
+            for c, mask in enumerate([low, medium, high]):
+                counts[chunk, :, c] = (self.sector_matrix @ mask.astype(np.float32)).T
+
+        scenario_ids = np.repeat(np.arange(len(scenarios)), len(self.sectors))
+        result = pd.DataFrame(
+            {
+                "SCENARIO": scenario_ids,
+                "NB_TRANSACTIONS_THRESHOLD": _as_int_if_integral(
+                    thresholds[scenario_ids]
+                ),
+                "LOW_RISK_MAX_SCORE": _as_int_if_integral(low_max[scenario_ids]),
+                "MEDIUM_RISK_MAX_SCORE": _as_int_if_integral(medium_max[scenario_ids]),
+                **{
+                    "WEIGHT_" + rule: _as_int_if_integral(weights[scenario_ids, r])
+                    for r, rule in enumerate(RULES)
+                },
+                "SECTOR": np.tile(np.asarray(self.sectors), len(scenarios)),
+            }
+        )
+        for c, category in enumerate(CATEGORIES):
+            result[category] = counts[:, :, c].reshape(-1).astype(int)
+
+        return result
@@ -0,0 +1,222 @@
+from src.lazy_import import LazyModule
+from src.risk_rules import FLAG_VALUES, HIGH_RISK_REVENUE_KINDS, IDENTIFICATION_LEVELS
+
+pd = LazyModule("pandas")
+np = LazyModule("numpy")
+
+# Expected layout of the five raw workbooks, keyed like DataLoader.file_mapping.
+# Validation runs on plain pandas frames, which can hold a column mixing numbers and
+# stray strings.
+# Each column spec gives the compact dtype the column is coerced to and, optionally:
+# - domain: allowed values (only for category columns)
+# - nullable: whether empty cells are allowed (default True)
+# - unique: whether values must be unique (default False)
+# - required: whether the column must be present (default True)
+# The domains that the risk rules look at are taken from src.risk_rules, so a value
+# scored by the rules is never rejected here.
+
+SECTORS = ("ECO", "SERVICE", "IMMO")
+FLAG = FLAG_VALUES
+ID_STATUS = IDENTIFICATION_LEVELS
+ARCHIVING = ("5A", "5A+", "5A-", "3A-")
+REGIONS = ("LU", "NON LU")
+PAYMENT_METHODS = ("VIR", "CHEQUE", "CASH", "AUTRE")
+SOFTWARES = ("CDDS", "WORLDCHECK", "DOWJONES", "AUTRE")
+REVENUE_KINDS = (
+    "ECO_AUTRE",
+    "ECO_COMPTABILIT",
+    "ECO_CONSEIL_GES",
+    "ECO_CREATION_SO",
+    "ECO_FISCALITE",
+    "ECO_PAYROLL",
+    "IMMO_ACHAT_VENT",
+    "IMMO_AUTRE",
+    "IMMO_LOCATION",
+    "SERV_AUTRE",
+    "SERV_BUREAU_EQU",
+    "SERV_BUREAU_VIR",
+    "SERV_COMPTABILI",
+    "SERV_SECRETARIA",
+    "SERV_SIEGE",
+) + HIGH_RISK_REVENUE_KINDS
+
+SURVEY_ID = {"dtype": "int32", "nullable": False}
+YEAR = {"dtype": "int16", "nullable": False}
+
+
+def _flag(required=True):
+    return {"dtype": "category", "domain": FLAG, "required": required}
+
+
+SCHEMAS = {
+    "master": {
+        "SURVEY_ID": {**SURVEY_ID, "unique": True},
+        "SECTOR": {"dtype": "category", "domain": SECTORS, "nullable": False},
+        "DEC_YEAR": YEAR,
+    },
+    "quest": {
+        "SURVEY_ID": {**SURVEY_ID, "unique": True},
+        "YEAR_OF_SUBMISSION": YEAR,
+        "SECTOR": {"dtype": "category", "domain": SECTORS, "nullable": False},
+        "NB_EMPLOYEES": {"dtype": "int32", "required": False},
+        "NB_EMPLOYEES_CONTACT_AML": {"dtype": "int32", "required": False},
+        "PERCENTAGE_CUST_LU": {"dtype": "float64", "required": False},
+        "PERCENTAGE_CUST_EU": {"dtype": "float64", "required": False},
+        "PERCENTAGE_CUST_NON_EU": {"dtype": "float64", "required": False},
+        "CLIENT_ID_STATUS": {"dtype": "category", "domain": ID_STATUS},
+        "BENIFICIARY_ID_STATUS": {"dtype": "category", "domain": ID_STATUS},
+        "BENIFICIARY_ID_SOFTWARE": _flag(required=False),
+        "BENIFICIARY_ID_INTERNET": _flag(required=False),
+        "CLIENT_REFUSAL": _flag(required=False),
+        "DOCUMENT_ARCHIVING": {"dtype": "category", "domain": ARCHIVING},
+        "RISK_ANALYSIS": _flag(required=False),
+        "COMPLIANCE_OFFICER": _flag(required=False),
+        "COMPLIANCE_PROCEDURE": _flag(required=False),
+        "COMPLIANCE_TRAINING": _flag(required=False),
+        "SUSP_TRANS_SURVEY": _flag(),
+        "BU_REL_REFUSAL": _flag(),
+        "BU_REL_REFUSAL_SURVEY": _flag(required=False),
+        "BU_REL_TERM": _flag(),
+        "BU_REL_TERM_SURVEY": _flag(required=False),
+    },
+    "payment": {
+        "SURVEY_ID": SURVEY_ID,
+        "REGION": {"dtype": "category", "domain": REGIONS, "nullable": False},
+        "PAYMENT_METHOD": {
+            "dtype": "category",
+            "domain": PAYMENT_METHODS,
+            "nullable": False,
+        },
+    },
+    "revenue": {
+        "SURVEY_ID": SURVEY_ID,
+        "REVENUE_KIND": {
+            "dtype": "category",
+            "domain": REVENUE_KINDS,
+            "nullable": False,
+        },
+        "REVENUE_YEAR": YEAR,
+        "REVENUE": {"dtype": "float64"},
+        "NB_TRANSACTIONS": {"dtype": "int32", "nullable": False},
+    },
+    "soft_check": {
+        "SURVEY_ID": SURVEY_ID,
+        "SOFTWARE": {"dtype": "category", "domain": SOFTWARES, "nullable": False},
+    },
+}
+
+VIOLATION_COLUMNS = ["SOURCE", "ROW", "COLUMN", "VALUE", "PROBLEM"]
+
+
+class SchemaError(ValueError):
+    """
+    Raised when a raw workbook does not match its schema.
+    """
+
+
+def _violations(source, column, values, problem):
+    return pd.DataFrame(
+        {
+            "SOURCE": source,
+            "ROW": values.index + 2,  # Excel row number, after the header row
+            "COLUMN": column,
+            "VALUE": values.astype(str).to_numpy(),
+            "PROBLEM": problem,
+        }
+    )
+
+
+def _check_column(source, column, values, spec):
+    """
+    Return the coerced column and the list of its violation frames.
+    """
+    violations = []
+    missing = values.isna()
+    dtype = spec["dtype"]
+
+    if not spec.get("nullable", True) and missing.any():
+        violations.append(
+            _violations(source, column, values[missing], "missing value")
+        )
+
+    if dtype == "category":
+        domain = list(spec["domain"])
+        outside = ~missing & ~values.isin(domain)
+        if outside.any():
+            violations.append(
+                _violations(
+                    source, column, values[outside], f"not one of {', '.join(domain)}"
+                )
+            )
+        return values.astype(pd.CategoricalDtype(domain)), violations
+
+    numbers = pd.to_numeric(values, errors="coerce")
+    not_numeric = ~missing & numbers.isna()
+    if not_numeric.any():
+        violations.append(
+            _violations(source, column, values[not_numeric], "not a number")
+        )
+
+    if dtype.startswith("int"):
+        limits = np.iinfo(dtype)
+        bad = numbers.notna() & (
+            (numbers % 1 != 0) | (numbers < limits.min) | (numbers > limits.max)
+        )
+        if bad.any():
+            violations.append(
+                _violations(source, column, values[bad], f"not a valid {dtype}")
+            )
+        if violations or missing.any():
+            # Keep the column usable for the rest of the report
+            return numbers, violations
+
+    return numbers.astype(dtype), violations
+
+
+def validate(source: str, data):
+    """
+    Check a raw workbook against its schema in one vectorized pass per column.
+
+    Returns the data coerced to compact dtypes (categories for enumerated values and
+    narrow integers) and a frame listing the row-level violations, empty
+    when the workbook is valid. Column names are matched after stripping spaces.
+    """
+    schema = SCHEMAS[source]
+    columns = {column.strip(): column for column in data.columns}
+    violations = []
+    coerced = {}
+
+    for name, spec in schema.items():
+        if name not in columns:
+            if spec.get("required", True):
+                violations.append(
+                    pd.DataFrame(
+                        [[source, None, name, None, "missing column"]],
+                        columns=VIOLATION_COLUMNS,
+                    )
+                )
+            continue
+
+        column = columns[name]
+        values = data[column]
+        coerced[column], column_violations = _check_column(
+            source, name, values, spec
+        )
+        violations.extend(column_violations)
+
+        if spec.get("unique", False):
+            duplicated = values.notna() & values.duplicated(keep=False)
+            if duplicated.any():
+                violations.append(
+                    _violations(source, name, values[duplicated], "duplicated value")
+                )
+
+    if coerced:
+        data = data.assign(**coerced)
+
+    if violations:
+        violations = pd.concat(violations, ignore_index=True)
+    else:
+        violations = pd.DataFrame(columns=VIOLATION_COLUMNS)
+
+    return data, violations
@@ -0,0 +1,157 @@
+import os
+from datetime import datetime, timezone
+from src.lazy_import import LazyModule
+
+pd = LazyModule("fireducks.pandas")
+
+RUN_PREFIX = "RUN_ID="
+SCORE_FILE = "scores.parquet"
+SAME_AS_FILE = "SAME_AS"
+KEY_COLUMNS = ["SURVEY_ID", "INPUT_HASH"]
+DIFF_COLUMNS = [
+    "SURVEY_ID",
+    "SECTOR",
+    "PREVIOUS_RISK_SCORE",
+    "PREVIOUS_RISK_CATEGORY",
+    "RISK_SCORE",
+    "RISK_CATEGORY",
+]
+
+
+class ScoreStore:
+    """
+    Versioned history of the risk scores, stored as Parquet partitioned by run.
+
+    Each run is a directory RUN_ID=<UTC timestamp> holding one row per scored row with
+    SURVEY_ID, SECTOR, INPUT_HASH (hash of the scoring inputs of the row), RULE_VERSION,
+    RISK_SCORE and RISK_CATEGORY, in the original row order. Every run is recorded, but
+    a run whose scores are identical to the latest one only holds a SAME_AS file naming
+    the run that stores them.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    @staticmethod
+    def input_hashes(data, columns: list):
+        """
+        Hash the given input columns of every row.
+        """
+        return pd.util.hash_pandas_object(data[columns], index=False).to_numpy()
+
+    def runs(self):
+        """
+        List the stored run ids, oldest first.
+        """
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(
+            name[len(RUN_PREFIX) :]
+            for name in os.listdir(self.root)
+            if name.startswith(RUN_PREFIX)
+            and (
+                os.path.exists(os.path.join(self.root, name, SCORE_FILE))
+                or os.path.exists(os.path.join(self.root, name, SAME_AS_FILE))
+            )
+        )
+
+    def _stored_run(self, run_id: str):
+        """
+        Id of the run whose directory holds the scores of run_id.
+        """
+        same_as_path = os.path.join(self.root, RUN_PREFIX + run_id, SAME_AS_FILE)
+        if os.path.exists(same_as_path):
+            with open(same_as_path) as file:
+                return file.read().strip()
+        return run_id
+
+    def load(self, run_id: str = None):
+        """
+        Load the scores of a run, the latest one by default. Returns None when the
+        store is empty.
+        """
+        runs = self.runs()
+        if not runs:
+            return None
+        run_id = run_id if run_id is not None else runs[-1]
+        return pd.read_parquet(
+            os.path.join(self.root, RUN_PREFIX + self._stored_run(run_id), SCORE_FILE)
+        )
+
+    def lookup(self, rule_version: str):
+        """
+        Scores of the latest run that were computed with rule_version, one row per
+        (SURVEY_ID, INPUT_HASH), ready to be merged onto new data.
+        """
+        latest = self.load()
+        if latest is None:
+            return None
+        latest = latest[latest["RULE_VERSION"] == rule_version]
+        return latest[KEY_COLUMNS + ["RISK_SCORE", "RISK_CATEGORY"]].drop_duplicates(
+            subset=KEY_COLUMNS
+        )
+
+    def save(self, scores):
+        """
+        Record the scores as a new run and return its id. When they are identical to
+        the latest run, the new run points to the stored scores instead of copying them.
+        """
+        runs = self.runs()
+        latest = self.load() if runs else None
+
+        run_id = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+        run_dir = os.path.join(self.root, RUN_PREFIX + run_id)
+        os.makedirs(run_dir, exist_ok=True)
+
+        # Write then rename so that an interrupted run never looks complete
+        if latest is not None and latest.reset_index(drop=True).equals(
+            scores.reset_index(drop=True)
+        ):
+            tmp_path = os.path.join(run_dir, "." + SAME_AS_FILE)
+            with open(tmp_path, "w") as file:
+                file.write(self._stored_run(runs[-1]))
+            os.replace(tmp_path, os.path.join(run_dir, SAME_AS_FILE))
+        else:
+            tmp_path = os.path.join(run_dir, "." + SCORE_FILE)
+            scores.to_parquet(tmp_path, index=False)
+            os.replace(tmp_path, os.path.join(run_dir, SCORE_FILE))
+
+        return run_id
+
+    def diff(self, previous_run: str = None, current_run: str = None):
+        """
+        List the clients whose risk category changed between two runs. current_run
+        defaults to the latest run and previous_run to the run just before
+        current_run, so the list is empty after an unchanged run. Like
+        find_high_risk_clients, a client is represented by its first row.
+        """
+        runs = self.runs()
+        if current_run is None:
+            if not runs:
+                return pd.DataFrame(columns=DIFF_COLUMNS)
+            current_run = runs[-1]
+        if previous_run is None:
+            # Run ids are timestamps, so they sort chronologically
+            earlier_runs = [run for run in runs if run < current_run]
+            if not earlier_runs:
+                return pd.DataFrame(columns=DIFF_COLUMNS)
+            previous_run = earlier_runs[-1]
+
+        columns = ["SURVEY_ID", "SECTOR", "RISK_SCORE", "RISK_CATEGORY"]
+        previous = self.load(previous_run).drop_duplicates(subset=["SURVEY_ID"])
+        current = self.load(current_run).drop_duplicates(subset=["SURVEY_ID"])
+
+        changes = current[columns].merge(
+            previous[["SURVEY_ID", "RISK_SCORE", "RISK_CATEGORY"]].rename(
+                columns={
+                    "RISK_SCORE": "PREVIOUS_RISK_SCORE",
+                    "RISK_CATEGORY": "PREVIOUS_RISK_CATEGORY",
+                }
+            ),
+            on="SURVEY_ID",
+        )
+        changes = changes[
+            changes["RISK_CATEGORY"] != changes["PREVIOUS_RISK_CATEGORY"]
+        ]
+
+        return changes[DIFF_COLUMNS]
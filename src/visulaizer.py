@@ -1,12 +1,19 @@
-import matplotlib.pyplot as plt
-import fireducks.pandas as pd
-import numpy as np
 from src import OUTPUT_DIR
+from src.compliance_metrics import suspicious_operations_by_sector
+from src.lazy_import import LazyModule
+from src.output_writer import OutputWriter
+
+# Heavy dependencies are only imported the first time a chart is drawn
+plt = LazyModule("matplotlib.pyplot")
+pd = LazyModule("fireducks.pandas")
+np = LazyModule("numpy")
 
 
 class Visualizer:
-    def __init__(self, data):
+    def __init__(self, data, writer: OutputWriter = None):
         self.data = data
+        # Without a shared writer, charts and tables are written before each method returns
+        self.writer = writer if writer is not None else OutputWriter(max_workers=0)
 
     def plot_region_by_sector(self):
         """
@@ -75,51 +82,23 @@ class Visualizer:
                 )
 
         plt.tight_layout()
-        plt.savefig(
-            OUTPUT_DIR + "/charts/region_by_sector.png", dpi=300, bbox_inches="tight"
+        self.writer.save_figure(
+            fig,
+            OUTPUT_DIR + "/charts/region_by_sector.png",
+            dpi=300,
+            bbox_inches="tight",
         )
+        plt.close(fig)
 
     def plot_suspect_operations_by_sector(self):
         """
         Analyze suspicious operations requiring mandatory declarations (DOS = Déclaration d'Opérations Suspectes)
         """
 
-        # Entries that are X should be Y and entries that are None should be N
-        self.data["BU_REL_REFUSAL"] = self.data["BU_REL_REFUSAL"].replace(
-            {"X": "Y", None: "N"}
-        )
-        self.data["BU_REL_TERM"] = self.data["BU_REL_TERM"].replace(
-            {"X": "Y", None: "N"}
-        )
-        self.data["SUSP_TRANS_SURVEY"] = self.data["SUSP_TRANS_SURVEY"].replace(
-            {"X": "Y", None: "N"}
-        )
-
-        unique_data = self.data.drop_duplicates(subset=["SURVEY_ID"])
-
         fig, ax1 = plt.subplots(1, 1, figsize=(12, 10))
 
         # Calculate suspicious operations by sector
-        suspicious_ops = pd.DataFrame()
-
-        for sector in unique_data["SECTOR"].unique():
-            sector_data = unique_data[unique_data["SECTOR"] == sector]
-
-            # Count refusals
-            refusals = (sector_data["BU_REL_REFUSAL"] == "Y").sum()
-
-            # Count refusals WITHOUT DOS declaration
-            refusals_no_dos = (
-                (sector_data["BU_REL_REFUSAL"] == "Y")
-                & (sector_data["SUSP_TRANS_SURVEY"] != "Y")
-            ).sum()
-
-            # Count terminations
-            terminations = (sector_data["BU_REL_TERM"] == "Y").sum()
-
-            suspicious_ops.loc[sector, "Refus Suspect"] = refusals
-            suspicious_ops.loc[sector, "Refus SANS Déclaration DOS"] = refusals_no_dos
-            suspicious_ops.loc[sector, "Mise à Terme Suspecte"] = terminations
+        suspicious_ops = suspicious_operations_by_sector(self.data)
 
         # Create the stacked bar chart
         suspicious_ops[
@@ -157,11 +136,13 @@ class Visualizer:
             ax1.bar_label(container, labels=labels, label_type="center")
 
         plt.tight_layout()
-        plt.savefig(
+        self.writer.save_figure(
+            fig,
             OUTPUT_DIR + "/charts/suspicious_operations_by_sector.png",
             dpi=300,
             bbox_inches="tight",
         )
+        plt.close(fig)
 
     def plot_identification_compliance(self):
         """
@@ -234,11 +215,13 @@ class Visualizer:
             ax.tick_params(axis='x', rotation=0)
 
         plt.tight_layout()
-        plt.savefig(
+        self.writer.save_figure(
+            fig,
             OUTPUT_DIR + "/charts/identification_compliance_by_sector.png",
             dpi=300,
             bbox_inches="tight",
         )
+        plt.close(fig)
 
     def plot_document_archiving_compliance_by_sector(self):
         """
@@ -283,11 +266,13 @@ class Visualizer:
                 ax.text(i, v + 1, str(v), ha="center", va="bottom")
 
         plt.tight_layout()
-        plt.savefig(
+        self.writer.save_figure(
+            fig,
             OUTPUT_DIR + "/charts/document_archiving_compliance_by_sector.png",
             dpi=300,
             bbox_inches="tight",
         )
+        plt.close(fig)
 
     def plot_cash_transactions_by_sector(self):
         """
@@ -318,11 +303,13 @@ class Visualizer:
             ax.text(i, v + 0.5, str(v), ha="center", va="bottom")
 
         plt.tight_layout()
-        plt.savefig(
+        self.writer.save_figure(
+            fig,
             OUTPUT_DIR + "/charts/cash_transactions_by_sector.png",
             dpi=300,
             bbox_inches="tight",
         )
+        plt.close(fig)
 
         summary = pd.DataFrame(
             {
@@ -334,8 +321,8 @@ class Visualizer:
             summary["Clients Espèces"] / summary["Total Clients"] * 100
         ).round(1)
 
-        summary.to_excel(
-            OUTPUT_DIR + "/tables/cash_transactions_by_sector_summary.xlsx"
+        self.writer.save_excel(
+            summary, OUTPUT_DIR + "/tables/cash_transactions_by_sector_summary.xlsx"
         )
 
     def summarize_high_risk_revenue_by_sector(self):
@@ -400,16 +387,17 @@ class Visualizer:
             summary["Total Clients Risque Élevé"] / summary["Total Clients"] * 100
         ).round(1)
 
-        with pd.ExcelWriter(
-            OUTPUT_DIR + "/tables/high_risk_revenue_complete_summary.xlsx"
-        ) as writer:
-            summary.to_excel(writer, sheet_name="Résumé par Secteur")
+        sheets = [(summary, {"sheet_name": "Résumé par Secteur"})]
 
-            if immo_stats:
-                immo_stats_df = pd.DataFrame([immo_stats])
-                immo_stats_df.to_excel(
-                    writer, sheet_name="Statistiques IMMO", index=False
-                )
+        if immo_stats:
+            immo_stats_df = pd.DataFrame([immo_stats])
+            sheets.append(
+                (immo_stats_df, {"sheet_name": "Statistiques IMMO", "index": False})
+            )
+
+        self.writer.save_excel_sheets(
+            OUTPUT_DIR + "/tables/high_risk_revenue_complete_summary.xlsx", sheets
+        )
 
 
     def plot_risk_assesment_by_sector(self):
@@ -474,11 +462,13 @@ class Visualizer:
             ax.set_xticklabels(ax.get_xticklabels(), rotation=0)
 
         plt.tight_layout()
-        plt.savefig(
+        self.writer.save_figure(
+            fig,
             OUTPUT_DIR + "/charts/risk_assessment_by_sector.png",
             dpi=300,
             bbox_inches="tight",
         )
+        plt.close(fig)
 
         summary = pd.DataFrame(
             {
@@ -504,4 +494,6 @@ class Visualizer:
             summary["High Risk"] / summary["Total Clients"] * 100
         ).round(1)
 
-        summary.to_excel(OUTPUT_DIR + "/tables/risk_assessment_summary.xlsx")
+        self.writer.save_excel(
+            summary, OUTPUT_DIR + "/tables/risk_assessment_summary.xlsx"
+        )
@@ -0,0 +1,66 @@
+import os
+import pandas
+import pytest
+from src.data_loader import DataLoader
+
+PROCESSED_DATA = {
+    "SURVEY_ID": [1, 2, 2, 3, 4, 5, 6, 7],
+    "SECTOR": ["ECO", "IMMO", "IMMO", "SERVICE", "ECO", "IMMO", "SERVICE", "ECO"],
+    "REGION_RISK": ["LU", "NON LU", "NON LU", "LU", "NON LU", "LU", "LU", "NON LU"],
+    "BU_REL_REFUSAL": ["N", "Y", "Y", "N", "Y", "N", "N", "Y"],
+    "BU_REL_TERM": ["N", "N", "N", "Y", "Y", "N", "N", "Y"],
+    "IDENTIFICATION_COMPLIANCE": [
+        "AVANCEE",
+        "RISK",
+        "RISK",
+        "SIMPLE",
+        "RISK",
+        "SIMPLE",
+        "AVANCEE",
+        "RISK",
+    ],
+    "ARCHIVING_COMPLIANCE": [
+        "Conforme",
+        "Non Conforme",
+        "Non Conforme",
+        "Conforme",
+        "Non Conforme",
+        "Conforme",
+        "Conforme",
+        "Non Conforme",
+    ],
+    "PAYMENT_METHOD": ["VIR", "CASH", "VIR", "CASH", "CASH", "VIR", "CHEQUE", "CASH"],
+    "REVENUE_KIND": [
+        "ECO_AUTRE",
+        "SERV_FONCTION",
+        "SERV_FONCTION",
+        "SERV_VIRTUEL",
+        "ECO_CONSEIL_GES",
+        "IMMO_LOCATION",
+        "SERV_SIEGE",
+        "SERV_CREATION_S",
+    ],
+    "NB_TRANSACTIONS": [10, 80, 80, 61, 62, None, 5, 200],
+}
+
+
+@pytest.fixture
+def processed_data():
+    """
+    A small hand-built risk analysis frame, as written by RiskAnalyzer.process_data.
+    Survey 2 has two payment rows.
+    """
+    return pandas.DataFrame(PROCESSED_DATA)
+
+
+@pytest.fixture
+def data_loader(tmp_path, processed_data):
+    """
+    A DataLoader whose output directory already holds the processed data.
+    """
+    output_dir = str(tmp_path / "processed")
+    os.makedirs(output_dir)
+    processed_data.to_excel(
+        output_dir + "/risk_analysis_processed_data.xlsx", index=False
+    )
+    return DataLoader(str(tmp_path / "raw"), output_dir)
@@ -0,0 +1,76 @@
+import fireducks.pandas as pd
+from src.compliance_metrics import (
+    REFUSALS,
+    REFUSALS_WITHOUT_DOS,
+    TERMINATIONS,
+    TERMINATIONS_WITHOUT_DOS,
+    suspicious_operations_by_sector,
+)
+
+
+def _survey_data():
+    # Survey 3 has two payment rows and must only be counted once
+    return pd.DataFrame(
+        {
+            "SURVEY_ID": [1, 2, 3, 3, 4, 5, 6],
+            "SECTOR": ["ECO", "ECO", "IMMO", "IMMO", "SERVICE", "IMMO", "ECO"],
+            "BU_REL_REFUSAL": ["X", None, "X", "X", "X", None, "X"],
+            "BU_REL_TERM": [None, "X", "X", "X", None, "X", "X"],
+            "SUSP_TRANS_SURVEY": ["X", None, None, None, None, "X", None],
+        }
+    )
+
+
+def _per_sector_loop(data):
+    """
+    The per-sector loop previously used by Visualizer.plot_suspect_operations_by_sector.
+    """
+    data = data.copy()
+    for column in ["BU_REL_REFUSAL", "BU_REL_TERM", "SUSP_TRANS_SURVEY"]:
+        data[column] = data[column].replace({"X": "Y", None: "N"})
+    unique_data = data.drop_duplicates(subset=["SURVEY_ID"])
+
+    counts = {}
+    for sector in unique_data["SECTOR"].unique():
+        sector_data = unique_data[unique_data["SECTOR"] == sector]
+        refusal = sector_data["BU_REL_REFUSAL"] == "Y"
+        termination = sector_data["BU_REL_TERM"] == "Y"
+        no_declaration = sector_data["SUSP_TRANS_SURVEY"] != "Y"
+        counts[sector] = {
+            REFUSALS: int(refusal.sum()),
+            TERMINATIONS: int(termination.sum()),
+            REFUSALS_WITHOUT_DOS: int((refusal & no_declaration).sum()),
+            TERMINATIONS_WITHOUT_DOS: int((termination & no_declaration).sum()),
+        }
+    return counts
+
+
+def test_counts_match_per_sector_loop():
+    data = _survey_data()
+    result = suspicious_operations_by_sector(data)
+
+    expected = _per_sector_loop(data)
+    assert list(result.index) == list(expected)
+    for sector, counts in expected.items():
+        for column, count in counts.items():
+            assert result.loc[sector, column] == count
+
+
+def test_normalized_flags_give_the_same_counts():
+    raw = _survey_data()
+    normalized = raw.copy()
+    for column in ["BU_REL_REFUSAL", "BU_REL_TERM", "SUSP_TRANS_SURVEY"]:
+        normalized[column] = normalized[column].replace({"X": "Y", None: "N"})
+
+    assert suspicious_operations_by_sector(normalized).equals(
+        suspicious_operations_by_sector(raw)
+    )
+
+
+def test_input_is_not_modified():
+    data = _survey_data()
+    before = data.copy()
+
+    suspicious_operations_by_sector(data)
+
+    assert data.equals(before)
@@ -0,0 +1,87 @@
+import os
+import pandas
+import pytest
+from src.data_loader import DataLoader
+from src.schema import SchemaError
+
+RAW_DATA = {
+    "master": {
+        "SURVEY_ID": [1, 2],
+        "SECTOR": ["ECO", "IMMO"],
+        "DEC_YEAR": [2023, 2023],
+    },
+    "quest": {
+        "SURVEY_ID": [1, 2],
+        "YEAR_OF_SUBMISSION": [2023, 2023],
+        "SECTOR": ["ECO", "IMMO"],
+        "CLIENT_ID_STATUS": ["AVANCEE", "SIMPLE"],
+        "BENIFICIARY_ID_STATUS": ["AVANCEE", "AVANCEE"],
+        "DOCUMENT_ARCHIVING": ["5A", "3A-"],
+        "SUSP_TRANS_SURVEY": ["X", None],
+        "BU_REL_REFUSAL": [None, "X"],
+        "BU_REL_TERM": [None, None],
+    },
+    "payment": {
+        "SURVEY_ID": [1, 2, 2],
+        "REGION": ["LU", "LU", "NON LU"],
+        "PAYMENT_METHOD": ["VIR", "CASH", "VIR"],
+    },
+    "revenue": {
+        "SURVEY_ID": [1, 2],
+        "REVENUE_KIND": ["ECO_AUTRE", "SERV_VIRTUEL"],
+        "REVENUE_YEAR": [2022, 2022],
+        "REVENUE": [1000.0, 2500.5],
+        "NB_TRANSACTIONS": [12, 70],
+    },
+    "soft_check": {
+        "SURVEY_ID": [1, 2],
+        "SOFTWARE": ["CDDS", "WORLDCHECK"],
+    },
+}
+
+
+def _data_loader(tmp_path, **changes):
+    """
+    Write the raw workbooks, with the given {source: {column: values}} changes.
+    """
+    raw_dir, output_dir = tmp_path / "raw", tmp_path / "processed"
+    raw_dir.mkdir()
+    output_dir.mkdir()
+    data_loader = DataLoader(str(raw_dir), str(output_dir))
+    for source, file_name in data_loader.file_mapping.items():
+        data = {**RAW_DATA[source], **changes.get(source, {})}
+        pandas.DataFrame(data).to_excel(raw_dir / file_name, index=False)
+    return data_loader
+
+
+def test_valid_workbooks_are_merged(tmp_path):
+    data_loader = _data_loader(tmp_path)
+
+    data_loader.merge_all_data()
+
+    merged = data_loader.open_merged_data()
+    assert len(merged) == 3
+    assert not os.path.exists(data_loader.output_dir + "/schema_violations.csv")
+
+
+def test_violations_are_reported_row_by_row(tmp_path):
+    data_loader = _data_loader(
+        tmp_path,
+        master={"SURVEY_ID": [1, "abc"]},
+        payment={"PAYMENT_METHOD": ["VIR", "CASH", "CARTE"]},
+    )
+
+    with pytest.raises(SchemaError):
+        data_loader.merge_all_data()
+
+    violations = pandas.read_csv(data_loader.output_dir + "/schema_violations.csv")
+    rows = violations[["SOURCE", "ROW", "COLUMN", "VALUE"]].values.tolist()
+    assert rows == [
+        ["master", 3, "SURVEY_ID", "abc"],
+        ["payment", 4, "PAYMENT_METHOD", "CARTE"],
+    ]
+    assert violations["PROBLEM"].tolist() == [
+        "not a number",
+        "not one of VIR, CHEQUE, CASH, AUTRE",
+    ]
+    assert not os.path.exists(data_loader.output_dir + "/merged_data.xlsx")
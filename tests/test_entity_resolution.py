@@ -0,0 +1,102 @@
+import fireducks.pandas as pd
+from src.entity_resolution import EntityIndex
+from src.risk_analyzer import RiskAnalyzer
+
+
+def _declarations(rows):
+    return pd.DataFrame(
+        rows, columns=["SURVEY_ID", "REVENUE_KIND", "REVENUE_YEAR", "REVENUE"]
+    )
+
+
+def _entities(index):
+    entities = index.entities.to_pandas()
+    return dict(zip(entities["SURVEY_ID"], entities["ENTITY_ID"]))
+
+
+def test_surveys_sharing_declarations_are_linked():
+    data = _declarations(
+        [
+            # 1 and 2 share two declarations, 3 shares only one with them
+            (1, "ECO_AUTRE", 2020, 1234.56),
+            (1, "ECO_PAYROLL", 2021, 789.10),
+            (2, "ECO_AUTRE", 2020, 1234.56),
+            (2, "ECO_PAYROLL", 2021, 789.10),
+            (3, "ECO_AUTRE", 2020, 1234.56),
+            (3, "ECO_FISCALITE", 2021, 42.00),
+        ]
+    )
+
+    entities = _entities(EntityIndex(data))
+
+    assert entities == {1: 1, 2: 1, 3: 3}
+
+
+def test_links_are_transitive_across_sectors_and_years():
+    data = _declarations(
+        [
+            (5, "SERV_SIEGE", 2019, 100.01),
+            (5, "SERV_AUTRE", 2020, 200.02),
+            (7, "SERV_SIEGE", 2019, 100.01),
+            (7, "SERV_AUTRE", 2020, 200.02),
+            (7, "IMMO_LOCATION", 2021, 300.03),
+            (7, "IMMO_AUTRE", 2022, 400.04),
+            (9, "IMMO_LOCATION", 2021, 300.03),
+            (9, "IMMO_AUTRE", 2022, 400.04),
+        ]
+    )
+
+    entities = _entities(EntityIndex(data))
+
+    assert entities == {5: 5, 7: 5, 9: 5}
+
+
+def test_common_amounts_do_not_link_surveys():
+    # Round amounts declared by more than max_block_size surveys carry no identity
+    data = _declarations(
+        [
+            (survey_id, kind, 2020, 5000.0)
+            for survey_id in range(1, 5)
+            for kind in ["ECO_AUTRE", "ECO_PAYROLL"]
+        ]
+    )
+
+    entities = _entities(EntityIndex(data, max_block_size=3))
+
+    assert entities == {1: 1, 2: 2, 3: 3, 4: 4}
+
+
+def test_unknown_surveys_are_their_own_entity():
+    index = EntityIndex(_declarations([(1, "ECO_AUTRE", 2020, 10.0)]))
+
+    data = index.add_entity_ids(pd.DataFrame({"SURVEY_ID": [1, 2]}))
+
+    assert data["ENTITY_ID"].tolist() == [1, 2]
+
+
+def test_high_risk_clients_get_entity_risk(data_loader, tmp_path, monkeypatch):
+    monkeypatch.setattr("src.risk_analyzer.OUTPUT_DIR", str(tmp_path))
+    (tmp_path / "tables").mkdir()
+    # Survey 2 of the processed fixture is High (score 7), survey 1 has no risk factor
+    index = EntityIndex(
+        _declarations(
+            [
+                (1, "ECO_AUTRE", 2020, 11.11),
+                (1, "ECO_PAYROLL", 2021, 22.22),
+                (2, "ECO_AUTRE", 2020, 11.11),
+                (2, "ECO_PAYROLL", 2021, 22.22),
+            ]
+        )
+    )
+
+    high_risk_clients = RiskAnalyzer(data_loader).find_high_risk_clients(index)
+
+    client = high_risk_clients[high_risk_clients["SURVEY_ID"] == 2].to_pandas()
+    assert client["ENTITY_ID"].tolist() == [1]
+    assert client["ENTITY_SURVEYS"].tolist() == [2]
+    assert client["ENTITY_RISK_SCORE"].tolist() == [7]
+    assert client["ENTITY_RISK_CATEGORY"].tolist() == ["High"]
+
+    entities = pd.read_excel(tmp_path / "tables" / "all_high_risk_entities.xlsx")
+    entity = entities[entities["ENTITY_ID"] == 1]
+    assert sorted(entity["SURVEY_ID"].tolist()) == [1, 2]
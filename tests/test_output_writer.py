@@ -0,0 +1,27 @@
+import os
+import pandas
+from src.output_writer import OutputWriter
+
+
+def test_queued_writes_to_the_same_file_do_not_collide(tmp_path):
+    path = str(tmp_path / "same.xlsx")
+    frames = [pandas.DataFrame({"VALUE": [i] * 1000}) for i in range(8)]
+
+    with OutputWriter(max_workers=2, max_pending=8, use_processes=False) as writer:
+        for frame in frames:
+            writer.save_excel(frame, path, index=False)
+
+    assert os.listdir(tmp_path) == ["same.xlsx"]
+    assert pandas.read_excel(path)["VALUE"].nunique() == 1
+
+
+def test_queued_writes_in_worker_processes(tmp_path):
+    paths = [str(tmp_path / name) for name in ["first.xlsx", "second.xlsx"]]
+
+    with OutputWriter(max_workers=2) as writer:
+        for path in paths + paths:
+            writer.save_excel(pandas.DataFrame({"VALUE": [1, 2]}), path, index=False)
+
+    assert sorted(os.listdir(tmp_path)) == ["first.xlsx", "second.xlsx"]
+    for path in paths:
+        assert pandas.read_excel(path)["VALUE"].tolist() == [1, 2]
@@ -0,0 +1,51 @@
+import fireducks.pandas as pd
+from src.risk_analyzer import RiskAnalyzer
+from src.risk_sweep import CATEGORIES, RULES, RiskSweep, threshold_grid
+
+
+def _category_counts(sweep_result, scenario):
+    rows = sweep_result[sweep_result["SCENARIO"] == scenario]
+    return {
+        row["SECTOR"]: {category: row[category] for category in CATEGORIES}
+        for _, row in rows.to_pandas().iterrows()
+    }
+
+
+def test_default_scenario_matches_calculate_risk_scores(data_loader, processed_data):
+    scores = RiskAnalyzer(data_loader).calculate_risk_scores()
+    unique_scores = scores.drop_duplicates(subset=["SURVEY_ID"]).to_pandas()
+    expected = {
+        sector: {
+            category: int((group["RISK_CATEGORY"] == category).sum())
+            for category in CATEGORIES
+        }
+        for sector, group in unique_scores.groupby("SECTOR")
+    }
+
+    result = RiskSweep(pd.DataFrame(processed_data)).run([{}])
+
+    assert _category_counts(result, 0) == expected
+
+
+def test_scenario_parameters_are_reported(processed_data):
+    scenarios = threshold_grid([61, 100], [1], [3]) + [
+        {"WEIGHTS": {"REGION_RISK": 0.5}}
+    ]
+
+    result = RiskSweep(pd.DataFrame(processed_data)).run(scenarios)
+
+    assert len(result) == len(scenarios) * processed_data["SECTOR"].nunique()
+    assert result["NB_TRANSACTIONS_THRESHOLD"].dtype == "int64"
+    assert sorted(result["NB_TRANSACTIONS_THRESHOLD"].unique()) == [61, 100]
+    assert result["WEIGHT_PAYMENT_METHOD"].dtype == "int64"
+    assert sorted(result["WEIGHT_REGION_RISK"].unique()) == [0.5, 1.0]
+    assert all("WEIGHT_" + rule in result.columns for rule in RULES)
+
+
+def test_zero_weights_put_every_survey_in_low(processed_data):
+    scenario = {"WEIGHTS": {rule: 0 for rule in RULES}}
+
+    result = RiskSweep(pd.DataFrame(processed_data)).run([scenario])
+
+    assert result["Low"].sum() == processed_data["SURVEY_ID"].nunique()
+    assert result["Medium"].sum() == result["High"].sum() == 0
@@ -0,0 +1,125 @@
+import os
+import time
+import fireducks.pandas as pd
+import pandas
+from src.data_loader import DataLoader
+from src.risk_analyzer import RiskAnalyzer
+from src.score_store import ScoreStore
+
+MERGED_DATA = {
+    "SURVEY_ID": [1, 2, 2, 3],
+    "SECTOR": ["ECO", "IMMO", "IMMO", "SERVICE"],
+    "REGION": ["LU", "LU", "NON LU", "LU"],
+    "BU_REL_REFUSAL": [None, "X", "X", None],
+    "BU_REL_TERM": [None, None, None, "X"],
+    "SUSP_TRANS_SURVEY": [None, None, None, "X"],
+    "CLIENT_ID_STATUS": ["AVANCEE", "SIMPLE", "SIMPLE", "AVANCEE"],
+    "BENIFICIARY_ID_STATUS": ["AVANCEE", "AVANCEE", "AVANCEE", "AVANCEE"],
+    "DOCUMENT_ARCHIVING": ["5A", "3A-", "3A-", "3A-"],
+    "PAYMENT_METHOD": ["VIR", "CASH", "VIR", "CASH"],
+    "REVENUE_KIND": ["ECO_AUTRE", "SERV_FONCTION", "SERV_FONCTION", "SERV_SIEGE"],
+    "NB_TRANSACTIONS": [10, 40, 40, 50],
+}
+
+
+def _scores(categories):
+    return pd.DataFrame(
+        {
+            "SURVEY_ID": [1, 2],
+            "SECTOR": ["ECO", "IMMO"],
+            "INPUT_HASH": [11, 22],
+            "RULE_VERSION": ["v1", "v1"],
+            "RISK_SCORE": [{"Low": 0, "Medium": 2, "High": 5}[c] for c in categories],
+            "RISK_CATEGORY": categories,
+        }
+    )
+
+
+def test_unchanged_run_is_recorded_and_gives_an_empty_diff(tmp_path):
+    store = ScoreStore(str(tmp_path))
+
+    first = store.save(_scores(["Low", "Medium"]))
+    second = store.save(_scores(["Low", "High"]))
+    changes = store.diff()
+    third = store.save(_scores(["Low", "High"]))
+
+    assert store.runs() == [first, second, third]
+    assert changes["SURVEY_ID"].tolist() == [2]
+    assert changes["PREVIOUS_RISK_CATEGORY"].tolist() == ["Medium"]
+    assert changes["RISK_CATEGORY"].tolist() == ["High"]
+    assert len(store.diff()) == 0
+    assert len(store.diff(current_run=second)) == 1
+    assert store.load(third).equals(store.load(second))
+    assert not os.path.exists(tmp_path / ("RUN_ID=" + third) / "scores.parquet")
+
+
+def _run_pipeline(data_loader, store, output_dir):
+    """
+    The risk analysis steps of main.py.
+    """
+    analyzer = RiskAnalyzer(data_loader, score_store=store)
+    data = analyzer.calculate_risk_scores()
+    analyzer.find_high_risk_clients(data=data)
+    analyzer.find_high_risk_clients()
+    analyzer.report_category_changes()
+    return pandas.read_excel(output_dir + "/tables/risk_category_changes.xlsx")
+
+
+def _write_merged_data(data_loader, **changes):
+    merged_path = data_loader.output_dir + "/merged_data.xlsx"
+    processed_path = data_loader.output_dir + "/risk_analysis_processed_data.xlsx"
+    pandas.DataFrame({**MERGED_DATA, **changes}).to_excel(merged_path, index=False)
+    # Make sure the new merged data is seen as newer than the processed data
+    while os.path.exists(processed_path) and os.path.getmtime(
+        merged_path
+    ) <= os.path.getmtime(processed_path):
+        time.sleep(0.01)
+        os.utime(merged_path)
+
+
+def _pipeline(tmp_path, monkeypatch):
+    output_dir = str(tmp_path / "outputs")
+    os.makedirs(output_dir + "/tables")
+    monkeypatch.setattr("src.risk_analyzer.OUTPUT_DIR", output_dir)
+    data_loader = DataLoader(str(tmp_path / "raw"), str(tmp_path))
+    store = ScoreStore(str(tmp_path / "score_history"))
+    return data_loader, store, output_dir
+
+
+def test_each_pipeline_run_reports_the_rule_changes(tmp_path, monkeypatch):
+    data_loader, store, output_dir = _pipeline(tmp_path, monkeypatch)
+    _write_merged_data(data_loader)
+
+    first_report = _run_pipeline(data_loader, store, output_dir)
+    monkeypatch.setattr("src.risk_rules.NB_TRANSACTIONS_THRESHOLD", 30)
+    monkeypatch.setattr("src.risk_analyzer.RULE_VERSION", "lower-threshold")
+    second_report = _run_pipeline(data_loader, store, output_dir)
+    third_report = _run_pipeline(data_loader, store, output_dir)
+
+    # One run per pipeline execution
+    assert len(store.runs()) == 3
+    assert len(first_report) == 0
+    assert second_report["SURVEY_ID"].tolist() == [3]
+    assert second_report["PREVIOUS_RISK_CATEGORY"].tolist() == ["Medium"]
+    assert second_report["RISK_CATEGORY"].tolist() == ["High"]
+    assert len(third_report) == 0
+
+
+def test_raw_data_changes_are_rescored(tmp_path, monkeypatch, capsys):
+    data_loader, store, output_dir = _pipeline(tmp_path, monkeypatch)
+    _write_merged_data(data_loader)
+    _run_pipeline(data_loader, store, output_dir)
+    capsys.readouterr()
+
+    # Survey 1 now pays in cash and declares many transactions
+    _write_merged_data(
+        data_loader,
+        PAYMENT_METHOD=["CASH", "CASH", "VIR", "CASH"],
+        NB_TRANSACTIONS=[100, 40, 40, 50],
+    )
+    report = _run_pipeline(data_loader, store, output_dir)
+
+    assert "Scoring 1 new or changed rows out of 4" in capsys.readouterr().out
+    assert report["SURVEY_ID"].tolist() == [1]
+    assert report["PREVIOUS_RISK_CATEGORY"].tolist() == ["Low"]
+    assert report["RISK_CATEGORY"].tolist() == ["Medium"]
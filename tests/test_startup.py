@@ -0,0 +1,41 @@
+import json
+import os
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Importing the scoring modules must stay cheap: the heavy dependencies are only
+# loaded on first use (see src.lazy_import).
+IMPORT_BUDGET_SECONDS = 0.5
+HEAVY_MODULES = ("matplotlib", "numpy", "fireducks")
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import src.risk_analyzer
+import src.risk_rules
+elapsed = time.perf_counter() - start
+loaded = sorted({name.split(".")[0] for name in sys.modules} & set(%r))
+print(json.dumps({"elapsed": elapsed, "loaded": loaded}))
+""" % (HEAVY_MODULES,)
+
+
+def _probe():
+    # A fresh interpreter, so that nothing imported by pytest leaks into the check
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        cwd=REPO_ROOT,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(output)
+
+
+def test_import_does_not_load_heavy_modules():
+    assert _probe()["loaded"] == []
+
+
+def test_import_time_within_budget():
+    assert _probe()["elapsed"] < IMPORT_BUDGET_SECONDS